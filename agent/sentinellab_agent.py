@@ -9,8 +9,18 @@ import secrets
 import socket
 import time
 from datetime import datetime, timezone
-from urllib import request as urlrequest
-from urllib.error import URLError, HTTPError
+from http import client as http_client
+from urllib.parse import urlsplit
+
+try:
+    import orjson  # facultatif: sérialisation JSON en C si installé
+except ImportError:
+    orjson = None
+
+try:
+    import inotify_simple  # facultatif: réveil sur écriture au lieu de polling
+except ImportError:
+    inotify_simple = None
 
 
 # --- SSH parsing (auth.log) ---
@@ -18,112 +28,193 @@ from urllib.error import URLError, HTTPError
 # Feb 17 10:20:28 ubuntu sshd[1234]: Failed password for root from 10.0.0.5 port 54321 ssh2
 # Feb 17 10:20:30 ubuntu sshd[1234]: Accepted password for ubuntu from 10.0.0.5 port 54321 ssh2
 
-RE_FAILED = re.compile(r"Failed password for (?P<user>\S+) from (?P<ip>\d+\.\d+\.\d+\.\d+)")
-RE_ACCEPTED = re.compile(r"Accepted \S+ for (?P<user>\S+) from (?P<ip>\d+\.\d+\.\d+\.\d+)")
-RE_SYSLOG_TS = re.compile(r"^(?P<mon>\w{3})\s+(?P<day>\d{1,2})\s+(?P<hms>\d{2}:\d{2}:\d{2})\s+(?P<rest>.*)$")
-
+RE_SSH = re.compile(
+    r"(?:Failed password|Accepted \S+) for (?P<user>\S+) from (?P<ip>\d+\.\d+\.\d+\.\d+)"
+)
 MONTHS = {"Jan":1,"Feb":2,"Mar":3,"Apr":4,"May":5,"Jun":6,"Jul":7,"Aug":8,"Sep":9,"Oct":10,"Nov":11,"Dec":12}
 
+# Année figée au démarrage (hypothèse lab, cf. syslog_ts_to_iso)
+_YEAR = datetime.now().year
+
 
 def syslog_ts_to_iso(line: str) -> str:
     """
     Convertit un timestamp syslog sans année (ex: 'Feb 17 10:20:28') en ISO UTC.
     Hypothèse: année courante. C’est ok pour un lab.
     """
-    m = RE_SYSLOG_TS.match(line)
-    if not m:
-        return datetime.now(timezone.utc).isoformat()
+    # Découpage direct, pas de regex (split(None) gère 'Feb  7')
+    parts = line.split(None, 3)
+    if len(parts) >= 3:
+        mon = MONTHS.get(parts[0])
+        hms = parts[2]
+        if mon is not None and parts[1].isdigit() and len(hms) == 8:
+            # Pas d'objet datetime: l'heure est recopiée telle quelle depuis
+            # la ligne (on force en UTC pour rester cohérent avec le backend)
+            return f"{_YEAR:04d}-{mon:02d}-{int(parts[1]):02d}T{hms}+00:00"
 
-    mon = MONTHS.get(m.group("mon"), datetime.now().month)
-    day = int(m.group("day"))
-    h, mi, s = map(int, m.group("hms").split(":"))
-    now = datetime.now()
-    dt_local = datetime(now.year, mon, day, h, mi, s)  # naive (local)
-    # On force en UTC pour rester cohérent avec ton backend
-    return dt_local.replace(tzinfo=timezone.utc).isoformat()
+    return datetime.now(timezone.utc).isoformat()
 
 
-def parse_auth_line(host: str, line: str):
+def parse_auth_line(host: str, line: str) -> dict | None:
     # On ne traite que sshd
     if "sshd" not in line:
         return None
 
-    event_type = None
-    user = None
-    src_ip = None
-
-    m = RE_FAILED.search(line)
-    if m:
-        event_type = "ssh_failed_login"
-        user = m.group("user")
-        src_ip = m.group("ip")
-
-    m = RE_ACCEPTED.search(line)
-    if m:
-        event_type = "ssh_login_success"
-        user = m.group("user")
-        src_ip = m.group("ip")
+    # Préfiltre bon marché: évite la regex sur les lignes sans intérêt
+    if "Failed password" not in line and "Accepted " not in line:
+        return None
 
-    if not event_type:
+    m = RE_SSH.search(line)
+    if not m:
         return None
 
+    event_type = (
+        "ssh_failed_login" if m.group(0).startswith("Failed") else "ssh_login_success"
+    )
+
     return {
         "ts": syslog_ts_to_iso(line),
         "host": host,
         "event_type": event_type,
-        "src_ip": src_ip,
-        "user": user,
+        "src_ip": m.group("ip"),
+        "user": m.group("user"),
         "message": line.strip(),
     }
 
 
-def sign_hmac(secret: str, body_bytes: bytes):
+def sign_hmac(secret_bytes: bytes, body_bytes: bytes):
     ts = str(int(time.time()))
     nonce = secrets.token_hex(16)
-    msg = ts.encode() + b"\n" + nonce.encode() + b"\n" + body_bytes
-    sig = hmac.new(secret.encode(), msg, hashlib.sha256).hexdigest()
-    return ts, nonce, sig
-
-
-def post_json(url: str, secret: str, payload: dict, timeout: int = 5):
-    body_bytes = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
-    ts, nonce, sig = sign_hmac(secret, body_bytes)
-
-    req = urlrequest.Request(
-        url,
-        data=body_bytes,
-        method="POST",
-        headers={
-            "Content-Type": "application/json",
-            "X-Timestamp": ts,
-            "X-Nonce": nonce,
-            "X-Signature": sig,
-        },
-    )
-    with urlrequest.urlopen(req, timeout=timeout) as resp:
-        return resp.status, resp.read().decode("utf-8", errors="replace")
+    h = hmac.new(secret_bytes, digestmod=hashlib.sha256)
+    h.update(ts.encode())
+    h.update(b"\n")
+    h.update(nonce.encode())
+    h.update(b"\n")
+    h.update(body_bytes)
+    return ts, nonce, h.hexdigest()
+
+
+class BatchSender:
+    """
+    Accumule les événements et les poste par lots sur /ingest_batch,
+    en réutilisant une seule connexion HTTP (pas de handshake TCP par
+    événement, une seule signature HMAC par lot).
+    """
+
+    def __init__(self, url: str, secret: str, batch_max: int = 100,
+                 flush_interval: float = 0.5, retry_seconds: int = 2):
+        parts = urlsplit(url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if self.scheme == "https" else 80)
+        self.path = parts.path or "/"
+        self.secret_bytes = secret.encode()  # encode une fois, pas par lot
+        self.batch_max = batch_max
+        self.flush_interval = flush_interval
+        self.retry_seconds = retry_seconds
+        self.buf = []
+        self.last_flush = time.monotonic()
+        self.conn = None
+
+    def _post(self, body_bytes: bytes):
+        ts, nonce, sig = sign_hmac(self.secret_bytes, body_bytes)
+        if self.conn is None:
+            conn_cls = (
+                http_client.HTTPSConnection if self.scheme == "https"
+                else http_client.HTTPConnection
+            )
+            self.conn = conn_cls(self.host, self.port, timeout=5)
+        try:
+            self.conn.request(
+                "POST",
+                self.path,
+                body=body_bytes,
+                headers={
+                    "Content-Type": "application/json",
+                    "X-Timestamp": ts,
+                    "X-Nonce": nonce,
+                    "X-Signature": sig,
+                },
+            )
+            resp = self.conn.getresponse()
+            return resp.status, resp.read().decode("utf-8", errors="replace")
+        except Exception:
+            # Connexion morte: on la recréera au prochain essai
+            self.conn.close()
+            self.conn = None
+            raise
+
+    def add(self, evt: dict):
+        self.buf.append(evt)
+        if len(self.buf) >= self.batch_max:
+            self.flush()
+        else:
+            # Le plafond de 0.5 s doit tenir même sous flux continu: avec
+            # inotify, read() rend des événements tant qu'on écrit et le
+            # tick None n'arrive jamais — on vérifie donc l'échéance ici
+            self.maybe_flush()
+
+    def maybe_flush(self):
+        if self.buf and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if orjson is not None:
+            body_bytes = orjson.dumps(self.buf)
+        else:
+            body_bytes = json.dumps(self.buf, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+        # Retry simple
+        while True:
+            try:
+                status, body = self._post(body_bytes)
+                if 200 <= status < 300:
+                    break
+                print(f"[agent] server error {status}: {body}")
+            except Exception as e:
+                print(f"[agent] error: {e}")
+            time.sleep(self.retry_seconds)
+
+        self.buf.clear()
+        self.last_flush = time.monotonic()
 
 
 def follow_file(path: str):
     """
     Tail -F simple en Python:
     - lit la fin du fichier
-    - attend les nouvelles lignes
+    - attend les nouvelles lignes (inotify si dispo: zéro CPU à vide,
+      latence quasi nulle; sinon polling 200 ms)
+    - yield None sur un tick sans ligne, pour flusher les lots partiels
     """
-    with open(path, "r", encoding="utf-8", errors="replace") as f:
-        f.seek(0, os.SEEK_END)
-        while True:
-            line = f.readline()
-            if not line:
-                time.sleep(0.2)
-                continue
-            yield line
+    watcher = None
+    if inotify_simple is not None:
+        watcher = inotify_simple.INotify()
+        watcher.add_watch(path, inotify_simple.flags.MODIFY)
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            f.seek(0, os.SEEK_END)
+            while True:
+                line = f.readline()
+                if line:
+                    yield line
+                    continue
+                if watcher is not None:
+                    # Bloque jusqu'à la prochaine écriture (0.5 s max)
+                    if not watcher.read(timeout=500):
+                        yield None
+                else:
+                    time.sleep(0.2)
+                    yield None
+    finally:
+        if watcher is not None:
+            watcher.close()
 
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--file", default="/var/log/auth.log")
-    ap.add_argument("--url", default=os.getenv("SENTINELLAB_INGEST_URL", "http://127.0.0.1:8000/ingest"))
+    ap.add_argument("--url", default=os.getenv("SENTINELLAB_INGEST_URL", "http://127.0.0.1:8000/ingest_batch"))
     ap.add_argument("--secret", default=os.getenv("SENTINELLAB_HMAC_SECRET", ""))
     ap.add_argument("--host", default=os.getenv("SENTINELLAB_HOST", socket.gethostname()))
     ap.add_argument("--retry-seconds", type=int, default=2)
@@ -136,28 +227,22 @@ def main():
     print(f"[agent] following {args.file}")
     print(f"[agent] sending to {args.url} as host={args.host}")
 
+    sender = BatchSender(args.url, args.secret, retry_seconds=args.retry_seconds)
+
+    # Variables locales: évite les lookups globaux/attributs dans la boucle
+    agent_host = args.host
+    parse = parse_auth_line
+    add = sender.add
+    maybe_flush = sender.maybe_flush
+
     for line in follow_file(args.file):
-        evt = parse_auth_line(args.host, line)
-        if not evt:
+        if line is None:
+            maybe_flush()
             continue
 
-        # Retry simple
-        while True:
-            try:
-                status, body = post_json(args.url, args.secret, evt)
-                if status >= 200 and status < 300:
-                    break
-                print(f"[agent] server error {status}: {body}")
-                time.sleep(args.retry_seconds)
-            except HTTPError as e:
-                print(f"[agent] HTTPError {e.code}: {e.read().decode(errors='replace')}")
-                time.sleep(args.retry_seconds)
-            except URLError as e:
-                print(f"[agent] URLError: {e}")
-                time.sleep(args.retry_seconds)
-            except Exception as e:
-                print(f"[agent] error: {e}")
-                time.sleep(args.retry_seconds)
+        evt = parse(agent_host, line)
+        if evt:
+            add(evt)
 
 
 if __name__ == "__main__":
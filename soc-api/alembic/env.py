@@ -1,10 +1,11 @@
 from logging.config import fileConfig
 
+import asyncio
 import os
 import sys
 
-from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
 
@@ -19,19 +20,27 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # --- Import SQLAlchemy metadata (autogenerate needs this) ---
-from app.db import Base  # noqa: E402
+from app.db import Base, DATABASE_URL  # noqa: E402
 from app import models  # noqa: F401,E402  (imports Event/Alert into Base.metadata)
 
 target_metadata = Base.metadata
 
 
 def get_url() -> str:
-    # Prefer docker-compose DATABASE_URL
-    url = os.environ.get("DATABASE_URL")
-    if url:
-        return url
-    # fallback to alembic.ini (useful if you run locally without env var)
-    return config.get_main_option("sqlalchemy.url")
+    # An edited alembic.ini wins for local one-offs (the shipped file still
+    # carries the driver:// placeholder); otherwise reuse the app's URL,
+    # which already prefers docker-compose DATABASE_URL and maps sync URLs
+    # to the async drivers the migration engine below needs
+    url = config.get_main_option("sqlalchemy.url")
+    if not url or url.startswith("driver://") or os.environ.get("DATABASE_URL"):
+        return DATABASE_URL
+    if url.startswith("sqlite://"):
+        url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    elif url.startswith("postgresql+psycopg://"):
+        url = url.replace("postgresql+psycopg://", "postgresql+asyncpg://", 1)
+    elif url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
 
 
 def run_migrations_offline() -> None:
@@ -49,26 +58,38 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
-def run_migrations_online() -> None:
-    """Run migrations in 'online' mode."""
-    # Force sqlalchemy.url from env if present (docker)
-    config.set_main_option("sqlalchemy.url", get_url())
+def do_run_migrations(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        compare_type=True,
+    )
 
-    connectable = engine_from_config(
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    # The app only ships async drivers (asyncpg/aiosqlite), so build an
+    # async engine and hand alembic a sync facade via run_sync
+    connectable = async_engine_from_config(
         config.get_section(config.config_ini_section, {}) or {},
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
     )
 
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=target_metadata,
-            compare_type=True,
-        )
+    async with connectable.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await connectable.dispose()
+
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode."""
+    # Force sqlalchemy.url from env if present (docker)
+    config.set_main_option("sqlalchemy.url", get_url())
 
-        with context.begin_transaction():
-            context.run_migrations()
+    asyncio.run(run_async_migrations())
 
 
 if context.is_offline_mode():
@@ -0,0 +1,124 @@
+"""Partition events by received_at
+
+Postgres only: converts events into a declaratively range-partitioned
+table on received_at (epoch microseconds). Queries with a received_at
+bound (detection cold start, dashboard hour window) prune to the
+matching partitions, and retention becomes DETACH/DROP PARTITION
+instead of a bulk DELETE. A DEFAULT partition catches all rows until a
+partition-creation job (pg_partman or cron) takes over; the SQLite dev
+database keeps the plain table created by create_all.
+
+Revision ID: a1f3c9d7b2e4
+Revises:
+Create Date: 2026-08-26 15:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1f3c9d7b2e4'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_DAY_US = 86_400_000_000
+
+# Same columns as models.py, plus received_at in the primary key as
+# Postgres requires for the partition key
+_PARTITIONED_TABLE_SQL = """
+    CREATE TABLE {name} (
+        id SERIAL,
+        ts TIMESTAMPTZ NOT NULL,
+        host VARCHAR(128) NOT NULL,
+        event_type VARCHAR(64) NOT NULL,
+        src_ip VARCHAR(64),
+        "user" VARCHAR(64),
+        message TEXT NOT NULL,
+        received_at BIGINT NOT NULL,
+        PRIMARY KEY (id, received_at)
+    ) PARTITION BY RANGE (received_at)
+"""
+
+
+def _create_event_indexes() -> None:
+    # Same indexes as models.py; partitioned parents propagate them
+    op.execute("CREATE INDEX ix_events_id ON events (id)")
+    op.execute("CREATE INDEX ix_events_type_ip_rcv ON events (event_type, src_ip, received_at)")
+    op.execute("CREATE INDEX ix_events_ts ON events (ts)")
+    op.execute("CREATE INDEX ix_events_host ON events (host)")
+    op.execute('CREATE INDEX ix_events_user ON events ("user")')
+    op.execute("CREATE INDEX ix_events_received_at ON events (received_at)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    if not sa.inspect(bind).has_table("events"):
+        # Fresh database: alembic runs before the app's first create_all,
+        # so build the partitioned table directly and create_all skips it
+        op.execute(_PARTITIONED_TABLE_SQL.format(name="events"))
+        op.execute("CREATE TABLE events_default PARTITION OF events DEFAULT")
+        _create_event_indexes()
+        return
+
+    op.execute(_PARTITIONED_TABLE_SQL.format(name="events_part"))
+    op.execute("CREATE TABLE events_default PARTITION OF events_part DEFAULT")
+    op.execute("""
+        INSERT INTO events_part (id, ts, host, event_type, src_ip, "user", message, received_at)
+        SELECT id, ts, host, event_type, src_ip, "user", message, received_at FROM events
+    """)
+    op.execute("""
+        SELECT setval(
+            pg_get_serial_sequence('events_part', 'id'),
+            COALESCE((SELECT MAX(id) FROM events_part), 1)
+        )
+    """)
+    op.execute("DROP TABLE events")
+    op.execute("ALTER TABLE events_part RENAME TO events")
+
+    _create_event_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("""
+        CREATE TABLE events_plain (
+            id SERIAL PRIMARY KEY,
+            ts TIMESTAMPTZ NOT NULL,
+            host VARCHAR(128) NOT NULL,
+            event_type VARCHAR(64) NOT NULL,
+            src_ip VARCHAR(64),
+            "user" VARCHAR(64),
+            message TEXT NOT NULL,
+            received_at BIGINT NOT NULL
+        )
+    """)
+    op.execute("""
+        INSERT INTO events_plain (id, ts, host, event_type, src_ip, "user", message, received_at)
+        SELECT id, ts, host, event_type, src_ip, "user", message, received_at FROM events
+    """)
+    op.execute("""
+        SELECT setval(
+            pg_get_serial_sequence('events_plain', 'id'),
+            COALESCE((SELECT MAX(id) FROM events_plain), 1)
+        )
+    """)
+    op.execute("DROP TABLE events")
+    op.execute("ALTER TABLE events_plain RENAME TO events")
+
+    op.execute("CREATE INDEX ix_events_id ON events (id)")
+    op.execute("CREATE INDEX ix_events_type_ip_rcv ON events (event_type, src_ip, received_at)")
+    op.execute("CREATE INDEX ix_events_ts ON events (ts)")
+    op.execute("CREATE INDEX ix_events_host ON events (host)")
+    op.execute('CREATE INDEX ix_events_user ON events ("user")')
+    op.execute("CREATE INDEX ix_events_received_at ON events (received_at)")
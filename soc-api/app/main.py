@@ -1,31 +1,225 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
 from typing import Literal, Optional
 
+import hashlib
+import hmac
 import os
 import secrets
+import time
 
-from fastapi import FastAPI, Depends, HTTPException, Query, Request
-from fastapi.responses import HTMLResponse
+import orjson
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import HTMLResponse, ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.middleware.gzip import GZipMiddleware
 
 from pydantic import BaseModel, Field
-from sqlalchemy import select, desc, func
-from sqlalchemy.orm import Session
+from sqlalchemy import select, desc, func, insert, update, case, true, lambda_stmt
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .db import SessionLocal, engine, Base
-from .models import Event, Alert
+from .models import Event, Alert, EventBucket1m
 
 
-app = FastAPI(title="SentinelLab SOC")
+# HMAC auth for ingest (enabled when SENTINELLAB_HMAC_SECRET is set; the
+# agent signs every request). Replay protection: nonces live in a dict for
+# O(1) lookup, with a deque ordered by expiry so pruning pops from the
+# left instead of scanning the whole cache.
+HMAC_SECRET = os.getenv("SENTINELLAB_HMAC_SECRET", "")
+_SECRET_BYTES = HMAC_SECRET.encode()
+HMAC_MAX_SKEW_S = 300
+NONCE_TTL_S = 300
+
+NONCE_CACHE: dict = {}
+NONCE_ORDER: deque = deque()  # (expiry_ts, nonce), appended in expiry order
+
+
+def _prune_nonces(now: int):
+    while NONCE_ORDER and NONCE_ORDER[0][0] <= now:
+        _, nonce = NONCE_ORDER.popleft()
+        NONCE_CACHE.pop(nonce, None)
+
+
+async def verify_ingest_signature(request: Request):
+    if not HMAC_SECRET:
+        return  # dev mode: pas de secret, pas de verification
+
+    ts = request.headers.get("X-Timestamp")
+    nonce = request.headers.get("X-Nonce")
+    sig = request.headers.get("X-Signature")
+    if not (ts and nonce and sig):
+        raise HTTPException(status_code=401, detail="Missing signature headers")
+
+    try:
+        ts_int = int(ts)
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Bad timestamp")
+
+    now = int(time.time())
+    if abs(now - ts_int) > HMAC_MAX_SKEW_S:
+        raise HTTPException(status_code=401, detail="Stale timestamp")
+
+    _prune_nonces(now)
+    if nonce in NONCE_CACHE:
+        raise HTTPException(status_code=401, detail="Replayed nonce")
+
+    # Starlette caches the body, FastAPI reuses it for the Pydantic parse
+    body = await request.body()
+    h = hmac.new(_SECRET_BYTES, digestmod=hashlib.sha256)
+    h.update(ts.encode())
+    h.update(b"\n")
+    h.update(nonce.encode())
+    h.update(b"\n")
+    h.update(body)
+    try:
+        provided = bytes.fromhex(sig)
+    except ValueError:
+        raise HTTPException(status_code=401, detail="Bad signature")
+    if not hmac.compare_digest(h.digest(), provided):
+        raise HTTPException(status_code=401, detail="Bad signature")
+
+    NONCE_CACHE[nonce] = now
+    NONCE_ORDER.append((now + NONCE_TTL_S, nonce))
+
+
+# Detection: SSH brute force (>= 5 fails / 2 min / same IP).
+# Windows are kept in-process per src_ip; the DB is only consulted once
+# per IP after a restart to rebuild the window and the last-alert time.
+BRUTEFORCE_WINDOW_S = 120
+BRUTEFORCE_THRESHOLD = 5
+
+_ip_fails: dict[str, deque] = {}
+_last_alert_at: dict[str, float] = {}
+
+# Bound the per-IP state: sweep idle entries every N detections so a wide
+# scan across many source IPs cannot grow the dicts forever
+_DETECT_SWEEP_EVERY = 1000
+_detect_calls = 0
+
+
+def _sweep_detection_state(now_ts: float):
+    cutoff = now_ts - BRUTEFORCE_WINDOW_S
+    for ip in [ip for ip, dq in _ip_fails.items() if not dq or dq[-1] < cutoff]:
+        del _ip_fails[ip]
+    for ip in [ip for ip, t in _last_alert_at.items() if t < cutoff]:
+        del _last_alert_at[ip]
+
+# /dashboard/data is polled every few seconds by every open dashboard;
+# cache the payload briefly per filter tuple and drop it on new alerts.
+DASH_CACHE_TTL_S = 2.0
+_dash_cache: dict = {}  # key -> (expires_at_monotonic, body_bytes, etag)
+
+
+def _us_iso(us: int) -> str:
+    """Epoch microseconds -> ISO 8601 UTC (read path only)."""
+    return datetime.fromtimestamp(us / 1e6, tz=timezone.utc).isoformat()
 
-# Static + templates
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
-templates = Jinja2Templates(directory="app/templates")
 
-# DB init (MVP)
-Base.metadata.create_all(bind=engine)
+# Batched ingest: events are buffered here and flushed by _ingest_worker,
+# so N events share one INSERT + one commit instead of one fsync each.
+INGEST_BATCH_MAX = 500
+INGEST_FLUSH_MS = 20
+
+# Created in lifespan so it binds to the running event loop
+_ingest_queue: asyncio.Queue = None
+
+
+def _dialect_insert(table):
+    if engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    return dialect_insert(table)
+
+
+async def _bump_event_buckets(db, rows):
+    counts: dict = {}
+    for row in rows:
+        bucket = row["received_at"] // 60_000_000
+        counts[bucket] = counts.get(bucket, 0) + 1
+    ins = _dialect_insert(EventBucket1m).values(
+        [{"bucket": b, "count": n} for b, n in counts.items()]
+    )
+    await db.execute(ins.on_conflict_do_update(
+        index_elements=[EventBucket1m.bucket],
+        set_={"count": EventBucket1m.count + ins.excluded.count},
+    ))
+
+
+async def _flush_events(db, batch):
+    rows = [item[0] for item in batch]
+    # sort_by_parameter_order: RETURNING rows come back in arbitrary order
+    # otherwise, and the zip below would hand callers someone else's id
+    result = await db.execute(
+        insert(Event).returning(Event.id, sort_by_parameter_order=True), rows
+    )
+    ids = result.scalars().all()
+    await _bump_event_buckets(db, rows)
+    await db.commit()
+    for (_, fut), event_id in zip(batch, ids):
+        if not fut.done():
+            fut.set_result(event_id)
+
+
+async def _ingest_worker():
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _ingest_queue.get()]
+        deadline = loop.time() + INGEST_FLUSH_MS / 1000
+        while len(batch) < INGEST_BATCH_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_ingest_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        try:
+            async with SessionLocal() as db:
+                await _flush_events(db, batch)
+        except Exception as exc:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _ingest_queue
+    # DB init (MVP)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    _ingest_queue = asyncio.Queue()
+    worker = asyncio.create_task(_ingest_worker())
+    yield
+    worker.cancel()
+    try:
+        await worker
+    except asyncio.CancelledError:
+        pass
+    await engine.dispose()
+
+
+app = FastAPI(
+    title="SentinelLab SOC",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+# List/dashboard JSON is highly repetitive (field names, ISO timestamps)
+# and compresses 6-10x. Small payloads (/health, 304s) pass through.
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
+# Static + templates. Set SERVE_STATIC=0 when a reverse proxy (nginx/CDN)
+# serves /static, so asset requests never touch the event loop.
+if os.getenv("SERVE_STATIC", "1") == "1":
+    app.mount("/static", StaticFiles(directory="app/static"), name="static")
+templates = Jinja2Templates(directory="app/templates")
 
 # Basic auth for dashboard
 security = HTTPBasic()
@@ -47,12 +241,9 @@ def require_dashboard_auth(credentials: HTTPBasicCredentials = Depends(security)
     return credentials.username
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 class IngestEvent(BaseModel):
@@ -65,154 +256,285 @@ class IngestEvent(BaseModel):
 
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
-@app.post("/ingest")
-def ingest(event: IngestEvent, db: Session = Depends(get_db)):
+def _event_row(event: IngestEvent, received_at_us: int) -> dict:
     ts = event.ts
     if ts.tzinfo is None:
         ts = ts.replace(tzinfo=timezone.utc)
 
-    row = Event(
-        ts=ts,
-        host=event.host,
-        event_type=event.event_type,
-        src_ip=event.src_ip,
-        user=event.user,
-        message=event.message,
-        received_at=datetime.now(timezone.utc),
-    )
-    db.add(row)
-    db.commit()
-    db.refresh(row)
+    return {
+        "ts": ts,
+        "host": event.host,
+        "event_type": event.event_type,
+        "src_ip": event.src_ip,
+        "user": event.user,
+        "message": event.message,
+        "received_at": received_at_us,
+    }
 
-    # Detection: SSH brute force (>= 5 fails / 2 min / same IP)
-    if row.event_type == "ssh_failed_login" and row.src_ip:
-        window_start = datetime.now(timezone.utc) - timedelta(minutes=2)
-
-        fail_count_stmt = (
-            select(func.count())
-            .select_from(Event)
-            .where(Event.event_type == "ssh_failed_login")
-            .where(Event.src_ip == row.src_ip)
-            .where(Event.received_at >= window_start)
-        )
-        fail_count = db.execute(fail_count_stmt).scalar_one()
-
-        recent_alert_stmt = (
-            select(Alert.id)
-            .where(Alert.rule == "ssh_bruteforce")
-            .where(Alert.src_ip == row.src_ip)
-            .where(Alert.created_at >= window_start)
-            .limit(1)
-        )
-        recent_alert = db.execute(recent_alert_stmt).first()
 
-        if fail_count >= 5 and not recent_alert:
-            alert = Alert(
-                created_at=datetime.now(timezone.utc),
+async def _run_detection(db: AsyncSession, event: IngestEvent, received_at_us: int):
+    # Detection: SSH brute force (>= 5 fails / 2 min / same IP)
+    if event.event_type == "ssh_failed_login" and event.src_ip:
+        global _detect_calls
+        ip = event.src_ip
+        now_ts = received_at_us / 1e6
+
+        _detect_calls += 1
+        if _detect_calls % _DETECT_SWEEP_EVERY == 0:
+            _sweep_detection_state(now_ts)
+
+        dq = _ip_fails.get(ip)
+        if dq is None:
+            # Cold start for this IP: rebuild its state from the DB once.
+            # Seed into locals and publish only after the awaits — another
+            # handler for the same IP can run (and commit its event) while
+            # we sit on these queries, and an empty deque published early
+            # would make it skip its own seed and double-count.
+            window_start_us = received_at_us - BRUTEFORCE_WINDOW_S * 1_000_000
+            past = (await db.execute(
+                select(Event.received_at)
+                .where(Event.event_type == "ssh_failed_login")
+                .where(Event.src_ip == ip)
+                .where(Event.received_at >= window_start_us)
+                .where(Event.received_at < received_at_us)
+            )).scalars().all()
+
+            last_alert = (await db.execute(
+                select(func.max(Alert.created_at))
+                .where(Alert.rule == "ssh_bruteforce")
+                .where(Alert.src_ip == ip)
+            )).scalar_one()
+            if last_alert is not None and last_alert / 1e6 > _last_alert_at.get(ip, 0.0):
+                _last_alert_at[ip] = last_alert / 1e6
+
+            # Merge with whatever concurrent handlers appended meanwhile;
+            # the set union drops events counted both live and via the
+            # seed query, and sorting keeps the popleft prune correct
+            dq = _ip_fails.get(ip)
+            seeded = (us / 1e6 for us in past)
+            if dq is None:
+                dq = _ip_fails[ip] = deque(sorted(seeded))
+            else:
+                merged = sorted(set(dq) | set(seeded))
+                dq.clear()
+                dq.extend(merged)
+
+        dq.append(now_ts)
+        while dq and now_ts - dq[0] > BRUTEFORCE_WINDOW_S:
+            dq.popleft()
+
+        if (
+            len(dq) >= BRUTEFORCE_THRESHOLD
+            and now_ts - _last_alert_at.get(ip, 0.0) > BRUTEFORCE_WINDOW_S
+        ):
+            _last_alert_at[ip] = now_ts
+            await db.execute(insert(Alert).values(
+                created_at=received_at_us,
                 rule="ssh_bruteforce",
                 severity="high",
-                host=row.host,
-                src_ip=row.src_ip,
-                user=row.user,
-                message=f"SSH brute force suspected: {fail_count} failures in 2 min from {row.src_ip}",
+                host=event.host,
+                src_ip=ip,
+                user=event.user,
+                message=f"SSH brute force suspected: {len(dq)} failures in 2 min from {ip}",
                 is_active=True,
-            )
-            db.add(alert)
-            db.commit()
+            ))
+            await db.commit()
+            _dash_cache.clear()
+
 
-    return {"ok": True, "event_id": row.id}
+@app.post("/ingest")
+async def ingest(
+    event: IngestEvent,
+    db: AsyncSession = Depends(get_db),
+    _sig: None = Depends(verify_ingest_signature),
+):
+    received_at_us = time.time_ns() // 1000
+
+    fut = asyncio.get_running_loop().create_future()
+    await _ingest_queue.put((_event_row(event, received_at_us), fut))
+    event_id = await fut
+
+    await _run_detection(db, event, received_at_us)
+
+    return {"ok": True, "event_id": event_id}
+
+
+@app.post("/ingest_batch")
+async def ingest_batch(
+    events: list[IngestEvent],
+    db: AsyncSession = Depends(get_db),
+    _sig: None = Depends(verify_ingest_signature),
+):
+    if len(events) > INGEST_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"batch too large (max {INGEST_BATCH_MAX})")
+    if not events:
+        return {"ok": True, "count": 0, "event_ids": []}
+
+    received_at_us = time.time_ns() // 1000
+
+    # The client already batched: skip the queue and let the driver do one
+    # executemany INSERT ... RETURNING with a single commit. Ids must come
+    # back in parameter order so event_ids lines up with the payload.
+    rows = [_event_row(event, received_at_us) for event in events]
+    result = await db.execute(
+        insert(Event).returning(Event.id, sort_by_parameter_order=True), rows
+    )
+    event_ids = list(result.scalars().all())
+    await _bump_event_buckets(db, rows)
+    await db.commit()
+
+    for event in events:
+        await _run_detection(db, event, received_at_us)
+
+    return {"ok": True, "count": len(event_ids), "event_ids": event_ids}
+
+
+def _stream_json_items(result, to_dict):
+    """Chunked {"items":[...],"count":N} body: rows are serialized as they
+    arrive from the server-side cursor, never materialized as one list."""
+    async def gen():
+        count = 0
+        yield b'{"items":['
+        async for r in result:
+            item = orjson.dumps(to_dict(r))
+            yield item if count == 0 else b"," + item
+            count += 1
+        yield b'],"count":%d}' % count
+
+    return StreamingResponse(gen(), media_type="application/json")
+
+
+# Read-only projections: Core column selects + RowMapping, no ORM
+# instances, identity map or attribute descriptors on the read path
+_EVENT_COLS = (
+    Event.id, Event.ts, Event.host, Event.event_type,
+    Event.src_ip, Event.user, Event.message, Event.received_at,
+)
+_ALERT_COLS = (
+    Alert.id, Alert.created_at, Alert.rule, Alert.severity,
+    Alert.host, Alert.src_ip, Alert.user, Alert.message, Alert.is_active,
+)
+
+
+def _event_dict(m) -> dict:
+    d = dict(m)
+    d["received_at"] = _us_iso(d["received_at"])
+    return d
+
+
+def _alert_dict(m) -> dict:
+    d = dict(m)
+    d["created_at"] = _us_iso(d["created_at"])
+    return d
 
 
 @app.get("/events")
-def list_events(limit: int = 100, db: Session = Depends(get_db)):
+async def list_events(limit: int = 100, db: AsyncSession = Depends(get_db)):
     limit = max(1, min(limit, 500))
-    stmt = select(Event).order_by(desc(Event.received_at)).limit(limit)
-    rows = db.execute(stmt).scalars().all()
-
-    items = [
-        {
-            "id": r.id,
-            "ts": r.ts.isoformat(),
-            "host": r.host,
-            "event_type": r.event_type,
-            "src_ip": r.src_ip,
-            "user": r.user,
-            "message": r.message,
-            "received_at": r.received_at.isoformat(),
-        }
-        for r in rows
-    ]
-    return {"count": len(items), "items": items}
+    # lambda_stmt: the SQL string is compiled once and cached, only the
+    # limit parameter changes between requests
+    stmt = lambda_stmt(lambda: select(*_EVENT_COLS).order_by(desc(Event.received_at)))
+    stmt += lambda st: st.limit(limit)
+    result = (await db.stream(stmt)).mappings()
+    return _stream_json_items(result, _event_dict)
 
 
 @app.get("/alerts")
-def list_alerts(limit: int = 50, db: Session = Depends(get_db)):
+async def list_alerts(limit: int = 50, db: AsyncSession = Depends(get_db)):
     limit = max(1, min(limit, 200))
-    stmt = select(Alert).order_by(desc(Alert.created_at)).limit(limit)
-    rows = db.execute(stmt).scalars().all()
-
-    items = [
-        {
-            "id": a.id,
-            "created_at": a.created_at.isoformat(),
-            "rule": a.rule,
-            "severity": a.severity,
-            "host": a.host,
-            "src_ip": a.src_ip,
-            "user": a.user,
-            "message": a.message,
-            "is_active": a.is_active,
-        }
-        for a in rows
-    ]
-    return {"count": len(items), "items": items}
+    stmt = lambda_stmt(lambda: select(*_ALERT_COLS).order_by(desc(Alert.created_at)))
+    stmt += lambda st: st.limit(limit)
+    result = (await db.stream(stmt)).mappings()
+    return _stream_json_items(result, _alert_dict)
+
+
+@app.get("/api/stats")
+async def stats(db: AsyncSession = Depends(get_db)):
+    # Served from the materialized 1-minute buckets: O(60) rows, no
+    # aggregation over the events table
+    since_bucket = time.time_ns() // 1000 // 60_000_000 - 60
+    rows = (await db.execute(
+        select(EventBucket1m.bucket, EventBucket1m.count)
+        .where(EventBucket1m.bucket >= since_bucket)
+        .order_by(EventBucket1m.bucket)
+    )).all()
+
+    return {
+        "window": "last hour",
+        "events_per_min": [
+            {"minute": _us_iso(bucket * 60_000_000)[:16], "count": count}
+            for bucket, count in rows
+        ],
+    }
 
 
 # ---------------- DASHBOARD ----------------
 
 @app.get("/", response_class=HTMLResponse)
-def dashboard(
+async def dashboard(
     request: Request,
     _: str = Depends(require_dashboard_auth),
 ):
     return templates.TemplateResponse("dashboard.html", {"request": request})
 
 
+def _dash_response(request: Request, body: bytes, etag: str) -> Response:
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
 @app.get("/dashboard/data")
-def dashboard_data(
+async def dashboard_data(
+    request: Request,
     _: str = Depends(require_dashboard_auth),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     alerts_limit: int = Query(25, ge=1, le=200),
     events_limit: int = Query(25, ge=1, le=200),
     active_only: bool = Query(True),
     severity: Optional[str] = Query(None),
     src_ip: Optional[str] = Query(None),
 ):
-    now = datetime.now(timezone.utc)
-    hour_ago = now - timedelta(hours=1)
-
-    active_alerts_count = db.execute(
-        select(func.count()).select_from(Alert).where(Alert.is_active.is_(True))
-    ).scalar_one()
-
-    total_alerts_count = db.execute(
-        select(func.count()).select_from(Alert)
-    ).scalar_one()
-
-    events_last_hour = db.execute(
-        select(func.count()).select_from(Event).where(Event.received_at >= hour_ago)
-    ).scalar_one()
-
-    total_events = db.execute(
-        select(func.count()).select_from(Event)
-    ).scalar_one()
+    cache_key = (alerts_limit, events_limit, active_only, severity, src_ip)
+    cached = _dash_cache.get(cache_key)
+    if cached and time.monotonic() < cached[0]:
+        return _dash_response(request, cached[1], cached[2])
+
+    hour_ago_us = time.time_ns() // 1000 - 3_600_000_000
+
+    # All four KPI counts in a single round-trip, one scan per table:
+    # conditional aggregates instead of one subquery per counter
+    alert_counts = (
+        select(
+            func.coalesce(
+                func.sum(case((Alert.is_active.is_(True), 1), else_=0)), 0
+            ).label("active_alerts"),
+            func.count().label("total_alerts"),
+        )
+        .select_from(Alert)
+        .subquery()
+    )
+    event_counts = (
+        select(
+            func.coalesce(
+                func.sum(case((Event.received_at >= hour_ago_us, 1), else_=0)), 0
+            ).label("events_last_hour"),
+            func.count().label("total_events"),
+        )
+        .select_from(Event)
+        .subquery()
+    )
+    kpi_stmt = select(alert_counts, event_counts).join_from(
+        alert_counts, event_counts, true()  # 1-row x 1-row join
+    )
+    kpi = (await db.execute(kpi_stmt)).one()
 
     # Alerts list
-    alerts_stmt = select(Alert)
+    alerts_stmt = select(*_ALERT_COLS)
     if active_only:
         alerts_stmt = alerts_stmt.where(Alert.is_active.is_(True))
     if severity:
@@ -220,50 +542,50 @@ def dashboard_data(
     if src_ip:
         alerts_stmt = alerts_stmt.where(Alert.src_ip == src_ip)
 
-    alerts = db.execute(
+    alerts = (await db.execute(
         alerts_stmt.order_by(desc(Alert.created_at)).limit(alerts_limit)
-    ).scalars().all()
-
-    alerts_json = [
-        {
-            "id": a.id,
-            "created_at": a.created_at.isoformat(),
-            "rule": a.rule,
-            "severity": a.severity,
-            "host": a.host,
-            "src_ip": a.src_ip,
-            "user": a.user,
-            "message": a.message,
-            "is_active": a.is_active,
-        }
-        for a in alerts
-    ]
+    )).mappings().all()
+    alerts_json = [_alert_dict(a) for a in alerts]
 
     # Events list
-    events = db.execute(
-        select(Event).order_by(desc(Event.received_at)).limit(events_limit)
-    ).scalars().all()
-
-    events_json = [
-        {
-            "id": e.id,
-            "received_at": e.received_at.isoformat(),
-            "event_type": e.event_type,
-            "host": e.host,
-            "src_ip": e.src_ip,
-            "user": e.user,
-            "message": e.message,
-        }
-        for e in events
-    ]
-
-    return {
+    events = (await db.execute(
+        select(
+            Event.id, Event.received_at, Event.event_type,
+            Event.host, Event.src_ip, Event.user, Event.message,
+        ).order_by(desc(Event.received_at)).limit(events_limit)
+    )).mappings().all()
+    events_json = [_event_dict(e) for e in events]
+
+    payload = {
         "kpi": {
-            "active_alerts": int(active_alerts_count),
-            "total_alerts": int(total_alerts_count),
-            "events_last_hour": int(events_last_hour),
-            "total_events": int(total_events),
+            "active_alerts": int(kpi.active_alerts),
+            "total_alerts": int(kpi.total_alerts),
+            "events_last_hour": int(kpi.events_last_hour),
+            "total_events": int(kpi.total_events),
         },
         "alerts": alerts_json,
         "events": events_json,
-    }
\ No newline at end of file
+    }
+    body = orjson.dumps(payload)
+    etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+    _dash_cache[cache_key] = (time.monotonic() + DASH_CACHE_TTL_S, body, etag)
+    return _dash_response(request, body, etag)
+
+
+@app.patch("/alerts/{alert_id}/resolve")
+async def resolve_alert(
+    alert_id: int,
+    _: str = Depends(require_dashboard_auth),
+    db: AsyncSession = Depends(get_db),
+):
+    result = await db.execute(
+        update(Alert)
+        .where(Alert.id == alert_id)
+        .values(is_active=False)
+        .returning(Alert.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    await db.commit()
+    _dash_cache.clear()
+    return {"ok": True, "alert_id": alert_id}
\ No newline at end of file
@@ -1,34 +1,65 @@
-from sqlalchemy import DateTime, Integer, String, Text, Boolean
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, Text, Boolean, text
 from sqlalchemy.orm import Mapped, mapped_column
-from datetime import datetime, timezone
+import time
+from datetime import datetime
 
 from .db import Base
 
 class Event(Base):
     __tablename__ = "events"
+    # Composite index for the brute-force window count on /ingest
+    __table_args__ = (
+        Index("ix_events_type_ip_rcv", "event_type", "src_ip", "received_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     ts: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
     host: Mapped[str] = mapped_column(String(128), index=True)
-    event_type: Mapped[str] = mapped_column(String(64), index=True)
-    src_ip: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+    # event_type/src_ip are covered by ix_events_type_ip_rcv
+    event_type: Mapped[str] = mapped_column(String(64))
+    src_ip: Mapped[str | None] = mapped_column(String(64), nullable=True)
     user: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     message: Mapped[str] = mapped_column(Text)
-    received_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
+    # Epoch microseconds UTC: cheap to write on ingest, formatted to ISO on read
+    received_at: Mapped[int] = mapped_column(BigInteger, index=True)
 
     @staticmethod
-    def utcnow() -> datetime:
-        return datetime.now(timezone.utc)
+    def utcnow_us() -> int:
+        return time.time_ns() // 1000
 class Alert(Base):
     __tablename__ = "alerts"
+    # Composite index for the duplicate-alert lookup on /ingest, plus a
+    # partial index so the dashboard's active-only count and list scan
+    # active rows only (severity/host keep plain indexes for the filters)
+    __table_args__ = (
+        Index("ix_alerts_rule_ip_created", "rule", "src_ip", "created_at"),
+        Index(
+            "ix_alerts_active",
+            "created_at",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
-    rule: Mapped[str] = mapped_column(String(128), index=True)
+    # Epoch microseconds UTC, same convention as Event.received_at
+    created_at: Mapped[int] = mapped_column(BigInteger, index=True)
+    # rule is the leading prefix of ix_alerts_rule_ip_created
+    rule: Mapped[str] = mapped_column(String(128))
     severity: Mapped[str] = mapped_column(String(16), index=True)  # low / medium / high
     host: Mapped[str | None] = mapped_column(String(128), nullable=True, index=True)
     src_ip: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     user: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
     message: Mapped[str] = mapped_column(Text)
-    is_active: Mapped[bool] = mapped_column(Boolean, default=True, index=True)
+    # No standalone index: active-alert queries go through ix_alerts_active
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+
+
+
+class EventBucket1m(Base):
+    __tablename__ = "event_bucket_1m"
 
+    # Epoch minutes UTC; maintained by upsert on ingest so /api/stats reads
+    # ~60 rows instead of aggregating the events table
+    bucket: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    count: Mapped[int] = mapped_column(Integer, default=0)